@@ -3,8 +3,9 @@ Common types and utilities shared across the deep research system.
 """
 
 from dataclasses import dataclass
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,8 @@ class TokenUsage:
     total_cost: float
     thinking_time: float = 0.0
     cached_prompt_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
 
 class TokenTracker:
     """Centralized token usage and cost tracking."""
@@ -37,39 +40,55 @@ class TokenTracker:
     }
     
     def __init__(self):
-        self.total_usage = TokenUsage(0, 0, 0, 0.0, 0.0, 0)
+        self.total_usage = TokenUsage(0, 0, 0, 0.0, 0.0, 0, 0, 0)
     
     @classmethod
-    def calculate_cost(cls, prompt_tokens: int, completion_tokens: int, cached_tokens: int, model: str) -> float:
-        """Calculate the cost of API usage based on model pricing."""
+    def calculate_cost(cls, prompt_tokens: int, completion_tokens: int, cached_tokens: int, model: str,
+                       cache_creation_tokens: int = 0, cache_read_tokens: int = 0) -> float:
+        """Calculate the cost of API usage based on model pricing.
+        
+        cached_tokens, cache_creation_tokens and cache_read_tokens are all
+        subsets of prompt_tokens. A given token must be reported in only one
+        of them (OpenAI: cached_tokens, Anthropic: cache_creation/cache_read).
+        """
         pricing = cls.MODEL_PRICING.get(model, cls.MODEL_PRICING["o3-mini"])
         
-        # Calculate regular input cost (excluding cached tokens)
-        regular_input_tokens = prompt_tokens - cached_tokens
+        # Calculate regular input cost (excluding all cached tokens)
+        regular_input_tokens = max(prompt_tokens - cached_tokens - cache_creation_tokens - cache_read_tokens, 0)
         regular_input_cost = (regular_input_tokens / 1_000_000) * pricing["input"]
         
         # Calculate cached tokens cost (half price)
         cached_cost = (cached_tokens / 1_000_000) * (pricing["input"] / 2)
         
+        # Cache writes carry a 25% surcharge, cache reads cost 10% of base input
+        cache_creation_cost = (cache_creation_tokens / 1_000_000) * (pricing["input"] * 1.25)
+        cache_read_cost = (cache_read_tokens / 1_000_000) * (pricing["input"] * 0.1)
+        
         # Calculate output cost
         output_cost = (completion_tokens / 1_000_000) * pricing["output"]
         
-        return regular_input_cost + cached_cost + output_cost
+        return regular_input_cost + cached_cost + cache_creation_cost + cache_read_cost + output_cost
     
     def update_usage(self, usage: Dict[str, int], thinking_time: float, model: str):
         """Update total usage with new API call results."""
         cached_tokens = usage.get('cached_prompt_tokens', 0)
+        cache_creation_tokens = usage.get('cache_creation_input_tokens', 0)
+        cache_read_tokens = usage.get('cache_read_input_tokens', 0)
         cost = self.calculate_cost(
             prompt_tokens=usage['prompt_tokens'],
             completion_tokens=usage['completion_tokens'],
             cached_tokens=cached_tokens,
-            model=model
+            model=model,
+            cache_creation_tokens=cache_creation_tokens,
+            cache_read_tokens=cache_read_tokens
         )
         
         # Update totals
         self.total_usage.prompt_tokens += usage['prompt_tokens']
         self.total_usage.completion_tokens += usage['completion_tokens']
         self.total_usage.cached_prompt_tokens += cached_tokens
+        self.total_usage.cache_creation_input_tokens += cache_creation_tokens
+        self.total_usage.cache_read_input_tokens += cache_read_tokens
         self.total_usage.total_tokens = self.total_usage.prompt_tokens + self.total_usage.completion_tokens
         self.total_usage.total_cost += cost
         self.total_usage.thinking_time += thinking_time
@@ -85,6 +104,8 @@ class TokenTracker:
         self.total_usage.prompt_tokens += token_usage.prompt_tokens
         self.total_usage.completion_tokens += token_usage.completion_tokens
         self.total_usage.cached_prompt_tokens += token_usage.cached_prompt_tokens
+        self.total_usage.cache_creation_input_tokens += token_usage.cache_creation_input_tokens
+        self.total_usage.cache_read_input_tokens += token_usage.cache_read_input_tokens
         self.total_usage.total_tokens = self.total_usage.prompt_tokens + self.total_usage.completion_tokens
         self.total_usage.total_cost += token_usage.total_cost
         self.total_usage.thinking_time += token_usage.thinking_time
@@ -97,6 +118,8 @@ class TokenTracker:
         logger.info(f"Input tokens: {usage['prompt_tokens']:,}")
         logger.info(f"Output tokens: {usage['completion_tokens']:,}")
         logger.info(f"Cached tokens: {cached_tokens:,}")
+        logger.info(f"Cache creation tokens: {usage.get('cache_creation_input_tokens', 0):,}")
+        logger.info(f"Cache read tokens: {usage.get('cache_read_input_tokens', 0):,}")
         logger.info(f"Total tokens: {usage['total_tokens']:,}")
         logger.info(f"Cost: ${cost:.6f}")
         logger.info(f"Thinking time: {thinking_time:.2f}s")
@@ -111,6 +134,101 @@ class TokenTracker:
         logger.info(f"Total Input Tokens: {self.total_usage.prompt_tokens:,}")
         logger.info(f"Total Output Tokens: {self.total_usage.completion_tokens:,}")
         logger.info(f"Total Cached Tokens: {self.total_usage.cached_prompt_tokens:,}")
+        logger.info(f"Total Cache Creation Tokens: {self.total_usage.cache_creation_input_tokens:,}")
+        logger.info(f"Total Cache Read Tokens: {self.total_usage.cache_read_input_tokens:,}")
         logger.info(f"Total Tokens: {self.total_usage.total_tokens:,}")
         logger.info(f"Total Cost: ${self.total_usage.total_cost:.6f}")
-        logger.info(f"Total Thinking Time: {self.total_usage.thinking_time:.2f}s") 
\ No newline at end of file
+        logger.info(f"Total Thinking Time: {self.total_usage.thinking_time:.2f}s")
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+def _find_hunk(lines: List[str], old: List[str], hint: int, cursor: int) -> int:
+    """Locate a hunk's old lines, preferring the position from its header."""
+    if not old:
+        return min(max(hint, cursor), len(lines))
+    if hint >= cursor and lines[hint:hint + len(old)] == old:
+        return hint
+    for pos in range(cursor, len(lines) - len(old) + 1):
+        if lines[pos:pos + len(old)] == old:
+            return pos
+    return -1
+
+def apply_unified_diff(original: str, unified_diff: str) -> str:
+    """
+    Apply a unified diff to a string.
+
+    Hunks are matched on their context and removed lines. Line numbers in the
+    hunk headers are only used as a hint, so slightly-off offsets still apply.
+    The line counts in the headers decide where each hunk body ends; anything
+    between hunks (file headers, trailing blank lines) is ignored.
+
+    Args:
+        original: Text to patch
+        unified_diff: Unified diff against the original text
+
+    Returns:
+        The patched text
+
+    Raises:
+        ValueError: If the diff is malformed or a hunk does not match
+    """
+    lines = unified_diff.splitlines()
+    hunks = []
+    i = 0
+    while i < len(lines):
+        if not lines[i].startswith('@@'):
+            i += 1
+            continue
+        match = _HUNK_HEADER.match(lines[i])
+        if not match:
+            raise ValueError(f"Malformed hunk header: {lines[i]}")
+        start = int(match.group(1))
+        old_count = int(match.group(2)) if match.group(2) is not None else 1
+        new_count = int(match.group(4)) if match.group(4) is not None else 1
+        old, new = [], []
+        new_ends_without_newline = False
+        i += 1
+        while len(old) < old_count or len(new) < new_count:
+            if i >= len(lines):
+                raise ValueError(f"Hunk starting at line {start} is truncated")
+            line = lines[i]
+            i += 1
+            # An empty line is a context line whose leading space was stripped
+            tag, text = (line[0], line[1:]) if line else (' ', '')
+            if tag == ' ':
+                old.append(text)
+                new.append(text)
+            elif tag == '-':
+                old.append(text)
+            elif tag == '+':
+                new.append(text)
+            else:
+                raise ValueError(f"Unexpected line in hunk: {line}")
+            # "\ No newline at end of file" applies to the line just read
+            if i < len(lines) and lines[i].startswith('\\'):
+                i += 1
+                if tag != '-':
+                    new_ends_without_newline = True
+        hunks.append((start, old, new, new_ends_without_newline))
+    if not hunks:
+        raise ValueError("No hunks found in diff")
+
+    source = original.splitlines(keepends=True)
+    stripped = [line.rstrip('\r\n') for line in source]
+    result = []
+    cursor = 0
+    for start, old, new, new_ends_without_newline in hunks:
+        # A pure insertion "@@ -N,0 ..." goes after line N; otherwise N is 1-based
+        hint = start if not old else max(start - 1, 0)
+        pos = _find_hunk(stripped, old, hint, cursor)
+        if pos < 0:
+            raise ValueError(f"Hunk starting at line {start} does not match the file")
+        result.extend(source[cursor:pos])
+        if new and result and not result[-1].endswith('\n'):
+            result[-1] += '\n'
+        result.extend(f"{line}\n" for line in new)
+        if new and new_ends_without_newline:
+            result[-1] = result[-1][:-1]
+        cursor = pos + len(old)
+    result.extend(source[cursor:])
+    return ''.join(result)
@@ -5,6 +5,7 @@ Using a multi-agent architecture with Planner and Executor agents.
 """
 
 import argparse
+import asyncio
 import logging
 import os
 import sys
@@ -15,6 +16,7 @@ from datetime import datetime
 from planner_agent import PlannerAgent, PlannerContext
 from executor_agent import ExecutorAgent, ExecutorContext
 from common import TokenUsage, TokenTracker
+from tools import chat_completion
 
 # Configure logging
 logging.basicConfig(
@@ -262,6 +264,9 @@ class ResearchSession:
         current_query = initial_query
         conversation_history = []
         task_complete = False
+        # The Planner is async; one loop is reused across rounds so the async
+        # HTTP client stays bound to the loop it was first used on
+        loop = asyncio.new_event_loop()
         
         try:
             # Initialize Background and Motivation with the initial query
@@ -285,7 +290,7 @@ class ResearchSession:
                 
                 # Get next steps from planner
                 logger.info("=== Control Flow: Requesting next steps from Planner ===")
-                next_steps = self.planner.plan(planner_context)
+                next_steps = loop.run_until_complete(self.planner.plan(planner_context))
                 if not next_steps:
                     logger.error("Planner failed to provide next steps")
                     break
@@ -409,6 +414,19 @@ class ResearchSession:
                 "Planner"
             )
         finally:
+            try:
+                # Cancel work left pending, e.g. a plan() interrupted by Ctrl-C
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                # Release the async client's connections before their loop goes away
+                loop.run_until_complete(chat_completion.aclose())
+            except Exception as e:
+                logger.error(f"Error shutting down planner event loop: {e}", exc_info=True)
+            finally:
+                loop.close()
             self.print_total_usage()
 
     def print_total_usage(self) -> None:
@@ -74,17 +74,23 @@ def save_response_to_file(response: str, tool_calls: List[Dict] = None, round_ti
 def log_usage(usage: Dict[str, int], thinking_time: float, step_name: str, model: str):
     """Log token usage and cost information."""
     cached_tokens = usage.get('cached_prompt_tokens', 0)
+    cache_creation_tokens = usage.get('cache_creation_input_tokens', 0)
+    cache_read_tokens = usage.get('cache_read_input_tokens', 0)
     cost = TokenTracker.calculate_cost(
         prompt_tokens=usage['prompt_tokens'],
         completion_tokens=usage['completion_tokens'],
         cached_tokens=cached_tokens,
-        model=model
+        model=model,
+        cache_creation_tokens=cache_creation_tokens,
+        cache_read_tokens=cache_read_tokens
     )
     
     logger.info(f"\n{step_name} Token Usage:")
     logger.info(f"Input tokens: {usage['prompt_tokens']:,}")
     logger.info(f"Output tokens: {usage['completion_tokens']:,}")
     logger.info(f"Cached tokens: {cached_tokens:,}")
+    logger.info(f"Cache creation tokens: {cache_creation_tokens:,}")
+    logger.info(f"Cache read tokens: {cache_read_tokens:,}")
     logger.info(f"Total tokens: {usage['total_tokens']:,}")
     logger.info(f"Total cost: ${cost:.6f}")
     logger.info(f"Thinking time: {thinking_time:.2f}s")
@@ -193,7 +199,7 @@ class ExecutorAgent:
                 
                 # Calculate thinking time and token usage
                 thinking_time = time.time() - start_time
-                usage = chat_completion.get_token_usage()
+                usage = chat_completion.get_last_usage()
                 
                 # Log usage statistics for this step only (don't update global tracker here)
                 log_usage(usage, thinking_time, "Step", self.model)
@@ -206,7 +212,9 @@ class ExecutorAgent:
                         total_tokens=usage['total_tokens'],
                         total_cost=usage['total_cost'],
                         thinking_time=thinking_time,
-                        cached_prompt_tokens=usage.get('cached_prompt_tokens', 0)
+                        cached_prompt_tokens=usage.get('cached_prompt_tokens', 0),
+                        cache_creation_input_tokens=usage.get('cache_creation_input_tokens', 0),
+                        cache_read_input_tokens=usage.get('cache_read_input_tokens', 0)
                     )
                 else:
                     # Add this step's usage to context's running total
@@ -216,6 +224,8 @@ class ExecutorAgent:
                     context.total_usage.total_cost += usage['total_cost']
                     context.total_usage.thinking_time += thinking_time
                     context.total_usage.cached_prompt_tokens += usage.get('cached_prompt_tokens', 0)
+                    context.total_usage.cache_creation_input_tokens += usage.get('cache_creation_input_tokens', 0)
+                    context.total_usage.cache_read_input_tokens += usage.get('cache_read_input_tokens', 0)
                 
                 message = response.choices[0].message
                 logger.debug(f"Received response type: {'content' if message.content else 'tool call'}")
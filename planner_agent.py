@@ -3,17 +3,26 @@ Planner Agent for Deep Research system.
 Responsible for high-level planning and task decomposition.
 """
 
+import itertools
 import logging
 import os
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Set, Dict, Optional
+from pathlib import Path
+from typing import List, Set, Dict, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 import json
 
 import openai
 
+try:
+    import orjson
+except ImportError:  # Optional, faster parsing of large function call payloads
+    orjson = None
+
 from tools import chat_completion
 from tool_definitions import function_definitions
 from common import TokenUsage, TokenTracker
@@ -23,6 +32,65 @@ logger = logging.getLogger(__name__)
 # Check if debug mode is enabled via command line argument
 DEBUG_MODE = '--debug' in sys.argv
 
+# Debug dumps are named by session start time plus a sequence number, which
+# avoids a clock read per save and keeps sub-second saves from colliding
+_SESSION_TS = datetime.now().strftime("%Y%m%d_%H%M%S")
+_SAVE_SEQ = itertools.count()
+
+# JSON helpers for the planner's hot path; orjson is used when available
+_json_loads = orjson.loads if orjson else json.loads
+
+def _json_dumps(obj) -> str:
+    """Serialize obj to a JSON string pretty-printed with 2-space indent."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+# Function schemas offered to the Planner. Kept at module level so the payload
+# sent to the provider is byte-identical across calls (prefix caching).
+_PLANNER_FN_SCHEMA = [{
+    "name": "create_file",
+    "description": "Create or update a file with the given content",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "filename": {
+                "type": "string",
+                "description": "Name of the file to create"
+            },
+            "content": {
+                "type": "string",
+                "description": "Content to write to the file"
+            }
+        },
+        "required": ["filename", "content"]
+    }
+}, {
+    "name": "patch_file",
+    "description": "Apply a unified diff to an existing file. Prefer this over create_file for edits",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "filename": {
+                "type": "string",
+                "description": "Name of the file to patch"
+            },
+            "unified_diff": {
+                "type": "string",
+                "description": "Unified diff against the file's current content, with @@ hunk headers"
+            }
+        },
+        "required": ["filename", "unified_diff"]
+    }
+}]
+
+# Model prefixes served by providers that honour explicit cache_control hints
+_CACHE_CONTROL_MODEL_PREFIXES = ('claude-', 'anthropic.')
+
+def _with_cache_control(text: str) -> List[Dict]:
+    """Wrap text as a content block marked as an ephemeral cache breakpoint."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
 @dataclass
 class PlannerContext:
     """Context information for the Planner agent."""
@@ -33,6 +101,7 @@ class PlannerContext:
     total_usage: Optional[TokenUsage] = None
     debug: bool = DEBUG_MODE  # Default to command line debug setting
     files_changed_this_round: Set[str] = None  # Track files changed in current round
+    scratchpad_updated: bool = False  # Whether scratchpad.md changed in current round
 
     def __post_init__(self):
         if self.files_changed_this_round is None:
@@ -41,75 +110,104 @@ class PlannerContext:
     def track_file_change(self, filename: str):
         """Track that a file was changed in this round."""
         self.files_changed_this_round.add(filename)
+        if filename == 'scratchpad.md':
+            self.scratchpad_updated = True
 
     def reset_file_changes(self):
         """Reset the file change tracking for a new round."""
         self.files_changed_this_round.clear()
+        self.scratchpad_updated = False
 
 def save_prompt_to_file(messages: List[Dict[str, str]], round_time: str = None, step: str = "planning"):
     """Save prompt messages to a file for debugging."""
-    if not os.path.exists('prompts'):
-        os.makedirs('prompts')
+    os.makedirs('prompts', exist_ok=True)
     
-    # Generate timestamp at save time if not provided
+    # Use the session timestamp and next sequence number if not provided
     if round_time is None:
-        round_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        round_time = f"{_SESSION_TS}_{next(_SAVE_SEQ):05d}"
         
     filename = f"prompts/{round_time}_planner_{step}_prompt.txt"
-    with open(filename, 'w', encoding='utf-8') as f:
-        for msg in messages:
-            f.write(f"Role: {msg['role']}\n")
-            f.write("Content:\n")
-            f.write(f"{msg['content']}\n")
-            if msg.get('function_call'):
-                f.write("Function Call:\n")
-                f.write(f"{json.dumps(msg['function_call'], indent=2)}\n")
-            f.write("-" * 80 + "\n")
+    parts = []
+    for msg in messages:
+        content = msg['content']
+        if isinstance(content, list):
+            # Content blocks (e.g. with cache_control); dump just their text
+            content = ''.join(block.get('text', '') for block in content)
+        parts.append(f"Role: {msg['role']}\n")
+        parts.append(f"Content:\n{content}\n")
+        if msg.get('function_call'):
+            parts.append(f"Function Call:\n{_json_dumps(msg['function_call'])}\n")
+        parts.append("-" * 80 + "\n")
+    Path(filename).write_text(''.join(parts), encoding='utf-8')
     logger.debug(f"Saved prompt to {filename}")
 
 def save_response_to_file(response: str, tool_calls: List[Dict] = None, round_time: str = None, step: str = "planning"):
     """Save response and tool calls to a file for debugging."""
-    if not os.path.exists('prompts'):
-        os.makedirs('prompts')
+    os.makedirs('prompts', exist_ok=True)
     
-    # Generate timestamp at save time if not provided
+    # Use the session timestamp and next sequence number if not provided
     if round_time is None:
-        round_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        round_time = f"{_SESSION_TS}_{next(_SAVE_SEQ):05d}"
         
     filename = f"prompts/{round_time}_planner_{step}_response.txt"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write("=== Response ===\n")
-        f.write(f"{response}\n")
-        if tool_calls:
-            f.write("\n=== Tool Calls ===\n")
-            for tool_call in tool_calls:
-                f.write(f"Tool: {tool_call.get('name', 'unknown')}\n")
-                f.write("Arguments:\n")
-                f.write(f"{json.dumps(tool_call.get('arguments', {}), indent=2, ensure_ascii=False)}\n")
-                f.write("-" * 80 + "\n")
+    parts = [f"=== Response ===\n{response}\n"]
+    if tool_calls:
+        parts.append("\n=== Tool Calls ===\n")
+        for tool_call in tool_calls:
+            arguments = _json_dumps(tool_call.get('arguments', {}))
+            parts.append(f"Tool: {tool_call.get('name', 'unknown')}\n")
+            parts.append(f"Arguments:\n{arguments}\n")
+            parts.append("-" * 80 + "\n")
+    Path(filename).write_text(''.join(parts), encoding='utf-8')
     logger.debug(f"Saved response to {filename}")
 
-def log_usage(usage: Dict[str, int], thinking_time: float, step_name: str, model: str):
+def log_usage(usage: Dict[str, int], thinking_time: float, step_name: str, model: str, turn: int = 1):
     """Log token usage and cost information."""
     cached_tokens = usage.get('cached_prompt_tokens', 0)
+    cache_creation_tokens = usage.get('cache_creation_input_tokens', 0)
+    cache_read_tokens = usage.get('cache_read_input_tokens', 0)
     cost = TokenTracker.calculate_cost(
         prompt_tokens=usage['prompt_tokens'],
         completion_tokens=usage['completion_tokens'],
         cached_tokens=cached_tokens,
-        model=model
+        model=model,
+        cache_creation_tokens=cache_creation_tokens,
+        cache_read_tokens=cache_read_tokens
     )
     
-    logger.info(f"\n{step_name} Token Usage:")
-    logger.info(f"Input tokens: {usage['prompt_tokens']:,}")
-    logger.info(f"Output tokens: {usage['completion_tokens']:,}")
-    logger.info(f"Cached tokens: {cached_tokens:,}")
-    logger.info(f"Total tokens: {usage['total_tokens']:,}")
-    logger.info(f"Total cost: ${cost:.6f}")
-    logger.info(f"Thinking time: {thinking_time:.2f}s")
+    # Skip formatting the report entirely when INFO records would be dropped
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"\n{step_name} Token Usage:")
+        logger.info(f"Input tokens: {usage['prompt_tokens']:,}")
+        logger.info(f"Output tokens: {usage['completion_tokens']:,}")
+        logger.info(f"Cached tokens: {cached_tokens:,}")
+        logger.info(f"Cache creation tokens: {cache_creation_tokens:,}")
+        logger.info(f"Cache read tokens: {cache_read_tokens:,}")
+        logger.info(f"Total tokens: {usage['total_tokens']:,}")
+        logger.info(f"Total cost: ${cost:.6f}")
+        logger.info(f"Thinking time: {thinking_time:.2f}s")
+    
+    # After the first turn the static prefix should be served from cache
+    if turn > 1 and cache_read_tokens == 0 and model.startswith(_CACHE_CONTROL_MODEL_PREFIXES):
+        logger.warning("No cache read tokens on turn %d for %s; the prompt prefix may have been invalidated", turn, model)
     
     # Update the usage dict with the new cost
     usage['total_cost'] = cost
 
+@lru_cache(maxsize=4)
+def _read_system_prompt(mtime: float, today: str) -> str:
+    """Read .plannerrules and append today's date.
+
+    Cached on the file's mtime and the date, so the prompt is only rebuilt
+    when the rules change or the day rolls over.
+    """
+    today_prompt = f"""You are the Planner agent in a multi-agent research system. Today's date is {today}. Take this into consideration when you plan tasks and analyze progress."""
+    
+    with open('.plannerrules', 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+        logger.debug("Loaded planner rules")
+        return f"{content}\n{today_prompt}"
+
 class PlannerAgent:
     """
     Planner agent that maintains full context and plans next steps.
@@ -123,117 +221,196 @@ class PlannerAgent:
             model: The OpenAI model to use
         """
         self.model = model
+        self.system_prompt: Optional[str] = None
         self.system_prompt = self._load_system_prompt()
+        # filename -> (mtime, size, content) of the last read, to skip unchanged files
+        self._file_cache: Dict[str, Tuple[float, int, str]] = {}
+        # Last built prompt and the inputs it was built from, for no-op replans
+        self._last_prompt_key: Optional[Tuple] = None
+        self._last_messages: List[Dict] = []
         
     def _load_system_prompt(self) -> str:
-        """Load system prompt from .plannerrules file."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        today_prompt = f"""You are the Planner agent in a multi-agent research system. Today's date is {today}. Take this into consideration when you plan tasks and analyze progress."""
+        """Load system prompt from .plannerrules file.
         
-        if os.path.exists('.plannerrules'):
-            with open('.plannerrules', 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                logger.debug("Loaded planner rules")
-                return f"{content}\n{today_prompt}"
-        else:
+        Once a prompt has been loaded, a missing or unreadable file keeps the
+        last good prompt instead of failing the planning round.
+        """
+        try:
+            mtime = os.path.getmtime('.plannerrules')
+            return _read_system_prompt(mtime, datetime.now().strftime("%Y-%m-%d"))
+        except OSError as e:
+            if self.system_prompt is not None:
+                logger.warning("Could not reload .plannerrules (%s), keeping the previous system prompt", e)
+                return self.system_prompt
             raise FileNotFoundError("Required .plannerrules file not found")
 
+    @staticmethod
+    def _read_one(filename: str) -> Tuple[str, bool]:
+        """Read a single file, returning its content and whether the read succeeded."""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                content = f.read()
+                logger.debug("Loaded file %s", filename)
+                return content, True
+        except Exception as e:
+            logger.error(f"Error reading file {filename}: {e}")
+            return f"[Error reading file: {str(e)}]", False
+
     def _load_file_contents(self, context: PlannerContext) -> Dict[str, str]:
         """Load contents of all created files."""
         file_contents = {}
-        for filename in context.created_files:
+        misses = []
+        # Sorted so the rendered prompt is stable across rounds and processes
+        for filename in sorted(context.created_files):
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    logger.debug(f"Loaded file {filename}")
-                    file_contents[filename] = content
+                st = os.stat(filename)
             except Exception as e:
                 logger.error(f"Error reading file {filename}: {e}")
                 file_contents[filename] = f"[Error reading file: {str(e)}]"
+                continue
+            cached = self._file_cache.get(filename)
+            if cached and cached[0] == st.st_mtime and cached[1] == st.st_size:
+                file_contents[filename] = cached[2]
+            else:
+                file_contents[filename] = None  # Placeholder keeps the sorted order
+                misses.append((filename, st))
+        
+        if not misses:
+            return file_contents
+        
+        # Only files that changed are read, concurrently when there are several
+        filenames = [filename for filename, _ in misses]
+        if len(misses) == 1:
+            results = [self._read_one(filenames[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(misses))) as executor:
+                results = list(executor.map(self._read_one, filenames))
+        
+        for (filename, st), (content, ok) in zip(misses, results):
+            file_contents[filename] = content
+            if ok:
+                self._file_cache[filename] = (st.st_mtime, st.st_size, content)
         return file_contents
 
+    def _prompt_key(self, context: PlannerContext) -> Tuple:
+        """Cheap digest of everything _build_prompt depends on."""
+        file_stats = []
+        for filename in sorted(context.created_files):
+            try:
+                st = os.stat(filename)
+                file_stats.append((filename, st.st_mtime, st.st_size))
+            except OSError:
+                file_stats.append((filename, None, None))
+        return (self._load_system_prompt(), context.user_input, tuple(file_stats))
+
     def _build_prompt(self, context: PlannerContext) -> List[Dict[str, str]]:
-        """Build the complete prompt including context and files."""
+        """Build the complete prompt including context and files.
+
+        The layout is static-first, dynamic-last: system prompt, then file
+        contents, then the current user request, so that providers can reuse
+        the cached prefix between rounds. For Anthropic models the static
+        blocks are also marked with explicit cache_control breakpoints.
+        """
         logger.debug("Building planner prompt")
+        # Refresh in case the rules changed or the date rolled over (cached otherwise)
+        self.system_prompt = self._load_system_prompt()
+        use_cache_control = self.model.startswith(_CACHE_CONTROL_MODEL_PREFIXES)
         messages = [
-            {"role": "system", "content": self.system_prompt},
+            {
+                "role": "system",
+                "content": _with_cache_control(self.system_prompt) if use_cache_control else self.system_prompt
+            },
         ]
         
         # Add file contents
         file_contents = self._load_file_contents(context)
             
-        # Build context message
-        context_message = "\nCurrent User Request:\n"
-        context_message += f"{context.user_input}\n\n"
-        
-        # Add all files including scratchpad.md
+        # Build context message with all files including scratchpad.md.
+        # Unchanged bodies are always sent in full rather than replaced by an
+        # "unchanged" placeholder: each plan() call starts a fresh conversation,
+        # so the model has no earlier turn to refer back to. The repeated bytes
+        # are covered by provider prefix caching instead.
         if file_contents:
-            context_message += "Relevant Files:\n"
+            context_message = "Relevant Files:\n"
             for filename, content in file_contents.items():
                 context_message += f"\n--- {filename} ---\n{content}\n"
+            
+            messages.append({
+                "role": "user",
+                "content": _with_cache_control(context_message) if use_cache_control else context_message
+            })
         
-        # Add available files list
-        context_message += f"\nAvailable Files: {', '.join(context.created_files)}\n"
-        
-        messages.append({"role": "user", "content": context_message})
+        # The user request and the file list change most often, so they go last.
+        # file_contents is keyed in sorted order, which keeps the list stable.
+        available_files = ', '.join(file_contents)
+        messages.append({
+            "role": "user",
+            "content": f"\nCurrent User Request:\n{context.user_input}\n\nAvailable Files: {available_files}\n"
+        })
         return messages
 
-    def plan(self, context: PlannerContext) -> str:
+    async def plan(self, context: PlannerContext) -> str:
         """Plan next steps based on current state and user input."""
+        # Resolved once per round so the loop skips disabled log calls cheaply
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        info_enabled = logger.isEnabledFor(logging.INFO)
+        
         logger.info("=== Starting Planner planning ===")
         
         # Reset file change tracking for this round
         context.reset_file_changes()
         logger.info("Reset file change tracking for new round")
         
-        messages = self._build_prompt(context)
+        # Built once per round. Within the loop `messages` is append-only: file
+        # updates are reflected by the function call deltas, and the refreshed
+        # file contents are picked up on the next plan() call. Never rewrite
+        # earlier messages, as that would invalidate the cached prompt prefix.
+        prompt_key = self._prompt_key(context)
+        if prompt_key == self._last_prompt_key:
+            logger.debug("Inputs unchanged since last round, reusing planner prompt")
+            messages = list(self._last_messages)
+        else:
+            messages = self._build_prompt(context)
+            self._last_prompt_key = prompt_key
+            self._last_messages = list(messages)
+        
+        # Resolved once per round; the debug savers are only reached behind
+        # this flag, so nothing is formatted or written when debug is off
+        debug = context.debug
         
         # Save prompt if debug mode is enabled
-        if context.debug:
+        if debug:
             save_prompt_to_file(messages)
         
+        # Built once; `messages` is appended to in place on each iteration
+        chat_completion_args = {
+            "messages": messages,
+            "model": self.model,
+            "functions": _PLANNER_FN_SCHEMA,
+            "function_call": "auto"
+        }
+        
+        # Add reasoning_effort for models starting with 'o'
+        if self.model.startswith('o'):
+            chat_completion_args["reasoning_effort"] = 'high'
+        
+        turn = 0
         try:
             while True:  # Loop to handle chained function calls
+                turn += 1
                 # Start timer
                 start_time = time.time()
                 
-                logger.debug("Calling chat completion")
-                chat_completion_args = {
-                    "messages": messages,
-                    "model": self.model,
-                    "functions": [{
-                        "name": "create_file",
-                        "description": "Create or update a file with the given content",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "filename": {
-                                    "type": "string",
-                                    "description": "Name of the file to create"
-                                },
-                                "content": {
-                                    "type": "string",
-                                    "description": "Content to write to the file"
-                                }
-                            },
-                            "required": ["filename", "content"]
-                        }
-                    }],
-                    "function_call": "auto"
-                }
-                
-                # Add reasoning_effort for models starting with 'o'
-                if self.model.startswith('o'):
-                    chat_completion_args["reasoning_effort"] = 'high'
-                
-                response = chat_completion.chat_completion(**chat_completion_args)
+                if debug_enabled:
+                    logger.debug("Calling chat completion")
+                response = await chat_completion.achat_completion(**chat_completion_args)
                 
                 # Calculate thinking time and token usage
                 thinking_time = time.time() - start_time
-                usage = chat_completion.get_token_usage()
+                usage = chat_completion.get_last_usage()
                 
                 # Log usage statistics for this step only (don't update global tracker here)
-                log_usage(usage, thinking_time, "Step", self.model)
+                log_usage(usage, thinking_time, "Step", self.model, turn)
                 
                 # Store the current step's usage in context (without updating global tracker)
                 if not context.total_usage:
@@ -243,7 +420,9 @@ class PlannerAgent:
                         total_tokens=usage['total_tokens'],
                         total_cost=usage['total_cost'],
                         thinking_time=thinking_time,
-                        cached_prompt_tokens=usage.get('cached_prompt_tokens', 0)
+                        cached_prompt_tokens=usage.get('cached_prompt_tokens', 0),
+                        cache_creation_input_tokens=usage.get('cache_creation_input_tokens', 0),
+                        cache_read_input_tokens=usage.get('cache_read_input_tokens', 0)
                     )
                 else:
                     # Add this step's usage to context's running total
@@ -253,22 +432,26 @@ class PlannerAgent:
                     context.total_usage.total_cost += usage['total_cost']
                     context.total_usage.thinking_time += thinking_time
                     context.total_usage.cached_prompt_tokens += usage.get('cached_prompt_tokens', 0)
+                    context.total_usage.cache_creation_input_tokens += usage.get('cache_creation_input_tokens', 0)
+                    context.total_usage.cache_read_input_tokens += usage.get('cache_read_input_tokens', 0)
                 
                 message = response.choices[0].message
-                logger.debug(f"Received response type: {'content' if message.content else 'function call'}")
+                if debug_enabled:
+                    logger.debug("Received response type: %s", 'content' if message.content else 'function call')
                 
                 # Log the actual response content
-                if message.content:
-                    logger.info(f"Planner Response Content:\n{message.content}")
-                elif hasattr(message, 'function_call') and message.function_call:
-                    logger.info(f"Planner Function Call:\nName: {message.function_call.name}\nArguments: {message.function_call.arguments}")
+                if info_enabled:
+                    if message.content:
+                        logger.info("Planner Response Content:\n%s", message.content)
+                    elif hasattr(message, 'function_call') and message.function_call:
+                        logger.info("Planner Function Call:\nName: %s\nArguments: %s", message.function_call.name, message.function_call.arguments)
                 
                 # Save response if debug mode is enabled
-                if context.debug:
+                if debug:
                     tool_calls = []
                     if hasattr(message, 'function_call') and message.function_call:
                         tool_calls = [{'name': message.function_call.name, 
-                                     'arguments': json.loads(message.function_call.arguments)}]
+                                     'arguments': _json_loads(message.function_call.arguments)}]
                     save_response_to_file(message.content or "", tool_calls)
 
                 # Check for content responses first
@@ -279,8 +462,9 @@ class PlannerAgent:
                         return "TASK_COMPLETE"
                     elif content == "INVOKE_EXECUTOR":
                         # Check if scratchpad.md was updated in this round before allowing executor invocation
-                        logger.info(f"Files changed this round before invoking executor: {context.files_changed_this_round}")
-                        if 'scratchpad.md' not in context.files_changed_this_round:
+                        if info_enabled:
+                            logger.info("Files changed this round before invoking executor: %s", context.files_changed_this_round)
+                        if not context.scratchpad_updated:
                             warning = ("Warning: You are trying to invoke the executor without updating scratchpad.md. "
                                      "The executor will receive the same instructions as last time. "
                                      "Please update scratchpad.md with detailed instructions for the executor first.")
@@ -292,8 +476,8 @@ class PlannerAgent:
                             continue  # Retry with the warning message
                         return content
                     else:
-                        warning = "Warning: Planner should not output content directly. Please use create_file tool to write any output to files."
-                        logger.error(f'Unexpected content output: {content}\n{warning}')
+                        warning = "Warning: Planner should not output content directly. Please use the create_file or patch_file tool to write any output to files."
+                        logger.error('Unexpected content output: %s\n%s', content, warning)
                         messages.append({
                             "role": "user",
                             "content": warning
@@ -306,33 +490,46 @@ class PlannerAgent:
                     return "Error: Failed to update progress tracking"
                 
                 # Parse and execute the function call
-                arguments = json.loads(message.function_call.arguments)
+                func_name = message.function_call.name
+                raw_args = message.function_call.arguments
+                arguments = _json_loads(raw_args)
                 filename = arguments.get("filename")
-                content = arguments.get("content")
                 
                 # Update the file and track the change
-                from tools import create_file
-                create_file(filename=filename, content=content)
-                context.track_file_change(filename)
-                logger.info(f"Tracked file change for: {filename}")
+                if func_name == "patch_file":
+                    from tools import patch_file
+                    result = patch_file(filename=filename, unified_diff=arguments.get("unified_diff", ""))
+                else:
+                    from tools import create_file
+                    func_name = "create_file"
+                    result = create_file(filename=filename, content=arguments.get("content"))
+                
+                if result.startswith("Error"):
+                    logger.error("%s failed: %s", func_name, result)
+                else:
+                    context.track_file_change(filename)
+                    self._file_cache.pop(filename, None)
+                    if info_enabled:
+                        logger.info("Tracked file change for: %s", filename)
                 
-                # Add function call and result to conversation history
+                # Append only the function call and a short result; the context
+                # message is not rebuilt with the new file body
                 messages.append({
                     "role": "assistant",
                     "content": None,
                     "function_call": {
-                        "name": "create_file",
-                        "arguments": json.dumps(arguments)
+                        "name": func_name,
+                        "arguments": raw_args  # Echo verbatim rather than re-serializing
                     }
                 })
                 messages.append({
                     "role": "user",
-                    "content": f"Successfully created/updated file: {filename}"
+                    "content": result
                 })
                 
                 # Continue the loop to allow for more function calls
                 continue
             
         except Exception as e:
-            logger.error(f"Error during planning: {e}", exc_info=True)
+            logger.error("Error during planning: %s", e, exc_info=True)
             return f"Error during planning: {str(e)}" 
\ No newline at end of file
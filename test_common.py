@@ -0,0 +1,60 @@
+"""
+Tests for the unified diff parser used by the Planner's patch_file tool.
+"""
+
+import difflib
+import unittest
+
+from common import apply_unified_diff
+
+
+def make_diff(old: str, new: str, n: int = 1) -> str:
+    return ''.join(difflib.unified_diff(old.splitlines(True), new.splitlines(True), 'a', 'b', n=n))
+
+
+class ApplyUnifiedDiffTest(unittest.TestCase):
+
+    def test_round_trips_difflib_output(self):
+        old = "l1\nl2\nl3\nl4\nl5\n\nl7\n"
+        new = "l1\nl2 changed\nl3\nl4\nnew\nl5\n\nl7\nend\n"
+        self.assertEqual(apply_unified_diff(old, make_diff(old, new)), new)
+
+    def test_header_offsets_are_only_a_hint(self):
+        diff = "@@ -9,3 +9,3 @@\n a\n-b\n+B\n c\n"
+        self.assertEqual(apply_unified_diff("x\na\nb\nc\n", diff), "x\na\nB\nc\n")
+
+    def test_trailing_blank_lines_after_hunk_are_ignored(self):
+        diff = "@@ -1,3 +1,3 @@\n a\n \n-b\n+B\n\n"
+        self.assertEqual(apply_unified_diff("a\n\nb\n", diff), "a\n\nB\n")
+
+    def test_empty_line_inside_hunk_is_context(self):
+        diff = "@@ -1,3 +1,3 @@\n a\n\n-b\n+B\n"
+        self.assertEqual(apply_unified_diff("a\n\nb\n", diff), "a\n\nB\n")
+
+    def test_no_newline_marker_is_honoured(self):
+        diff = "@@ -1,3 +1,3 @@\n a\n-b\n+B\n c\n\\ No newline at end of file\n"
+        self.assertEqual(apply_unified_diff("a\nb\nc", diff), "a\nB\nc")
+
+    def test_adding_final_newline(self):
+        diff = "@@ -1,2 +1,2 @@\n a\n-b\n\\ No newline at end of file\n+b\n"
+        self.assertEqual(apply_unified_diff("a\nb", diff), "a\nb\n")
+
+    def test_pure_insertion(self):
+        diff = "@@ -1,0 +2,1 @@\n+inserted\n"
+        self.assertEqual(apply_unified_diff("a\nb\n", diff), "a\ninserted\nb\n")
+
+    def test_mismatched_hunk_raises(self):
+        with self.assertRaises(ValueError):
+            apply_unified_diff("a\n", "@@ -1,1 +1,1 @@\n-zzz\n+y\n")
+
+    def test_truncated_hunk_raises(self):
+        with self.assertRaises(ValueError):
+            apply_unified_diff("a\nb\n", "@@ -1,2 +1,2 @@\n a\n")
+
+    def test_diff_without_hunks_raises(self):
+        with self.assertRaises(ValueError):
+            apply_unified_diff("a\n", "--- a\n+++ b\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
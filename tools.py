@@ -21,7 +21,7 @@ import openai
 import requests
 from bs4 import BeautifulSoup
 
-from common import TokenTracker
+from common import TokenTracker, apply_unified_diff
 
 logger = logging.getLogger(__name__)
 
@@ -30,19 +30,21 @@ class CachedChatCompletion:
     
     def __init__(self):
         self.client = openai.OpenAI()
+        self.async_client = openai.AsyncOpenAI()
         self.token_tracker = TokenTracker()
+        # Usage reported by the most recent response (not session totals)
+        self.last_usage: Dict[str, int] = {}
     
-    def chat_completion(
+    def _build_params(
         self,
         messages: List[Dict[str, str]],
-        model: str = "gpt-4o",
-        temperature: float = 1.0,
-        functions: Optional[List[Dict]] = None,
-        function_call: Optional[Union[str, Dict]] = None,
-        reasoning_effort: str = 'high',
-    ) -> openai.types.chat.ChatCompletion:
-        """Get chat completion with OpenAI's built-in caching."""
-        # Prepare API call parameters
+        model: str,
+        temperature: float,
+        functions: Optional[List[Dict]],
+        function_call: Optional[Union[str, Dict]],
+        reasoning_effort: str,
+    ) -> Dict:
+        """Prepare API call parameters."""
         params = {
             "model": model,
             "messages": messages,
@@ -57,24 +59,83 @@ class CachedChatCompletion:
             params["functions"] = functions
         if function_call:
             params["function_call"] = function_call
-            
-        # Make API call
-        response = self.client.chat.completions.create(**params)
-        
-        # Update token usage tracking
+        return params
+    
+    def _track_usage(self, response: openai.types.chat.ChatCompletion, model: str) -> None:
+        """Record token usage reported in a chat completion response."""
         usage = {
             'prompt_tokens': response.usage.prompt_tokens,
             'completion_tokens': response.usage.completion_tokens,
             'total_tokens': response.usage.total_tokens,
-            'cached_prompt_tokens': getattr(response.usage.prompt_tokens_details, 'cached_tokens', 0) if hasattr(response.usage, 'prompt_tokens_details') else 0
+            'cached_prompt_tokens': getattr(getattr(response.usage, 'prompt_tokens_details', None), 'cached_tokens', 0) or 0,
+            # Reported by Anthropic-compatible providers only
+            'cache_creation_input_tokens': getattr(response.usage, 'cache_creation_input_tokens', 0) or 0,
+            'cache_read_input_tokens': getattr(response.usage, 'cache_read_input_tokens', 0) or 0
         }
         
+        # Anthropic-compatible proxies report cache reads both as cached_tokens
+        # and cache_read_input_tokens; keep only the latter so they are billed once
+        if usage['cache_read_input_tokens'] or usage['cache_creation_input_tokens']:
+            usage['cached_prompt_tokens'] = 0
+        self.last_usage = usage
+        
         # Calculate thinking time and update usage
         thinking_time = 0.0  # This should be passed in from the agent
         self.token_tracker.update_usage(usage, thinking_time, model)
+    
+    def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o",
+        temperature: float = 1.0,
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Union[str, Dict]] = None,
+        reasoning_effort: str = 'high',
+    ) -> openai.types.chat.ChatCompletion:
+        """Get chat completion with OpenAI's built-in caching."""
+        params = self._build_params(messages, model, temperature, functions, function_call, reasoning_effort)
+        
+        # Make API call
+        response = self.client.chat.completions.create(**params)
+        
+        # Update token usage tracking
+        self._track_usage(response, model)
+        
+        return response
+    
+    async def achat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o",
+        temperature: float = 1.0,
+        functions: Optional[List[Dict]] = None,
+        function_call: Optional[Union[str, Dict]] = None,
+        reasoning_effort: str = 'high',
+    ) -> openai.types.chat.ChatCompletion:
+        """Async variant of chat_completion using the async OpenAI client."""
+        params = self._build_params(messages, model, temperature, functions, function_call, reasoning_effort)
+        
+        # Make API call without blocking the event loop
+        response = await self.async_client.chat.completions.create(**params)
+        
+        # Update token usage tracking
+        self._track_usage(response, model)
         
         return response
     
+    async def aclose(self) -> None:
+        """Close the async client's connections and start over with a fresh client.
+        
+        Must be awaited on the loop the client was used on, before that loop
+        is closed. The replacement binds to whichever loop uses it next.
+        """
+        await self.async_client.close()
+        self.async_client = openai.AsyncOpenAI()
+    
+    def get_last_usage(self) -> Dict[str, int]:
+        """Get token usage of the most recent chat completion only."""
+        return dict(self.last_usage)
+    
     def get_token_usage(self) -> Dict[str, Union[int, float]]:
         """Get current token usage statistics."""
         usage = self.token_tracker.get_total_usage()
@@ -82,6 +143,8 @@ class CachedChatCompletion:
             "prompt_tokens": usage.prompt_tokens,
             "completion_tokens": usage.completion_tokens,
             "cached_prompt_tokens": usage.cached_prompt_tokens,
+            "cache_creation_input_tokens": usage.cache_creation_input_tokens,
+            "cache_read_input_tokens": usage.cache_read_input_tokens,
             "total_tokens": usage.total_tokens,
             "total_cost": usage.total_cost
         }
@@ -378,6 +441,27 @@ def create_file(filename: str, content: str) -> str:
     except Exception as e:
         return f"Error creating file: {str(e)}"
 
+def patch_file(filename: str, unified_diff: str) -> str:
+    """
+    Apply a unified diff to an existing file and return a success message.
+
+    Args:
+        filename: Name of the file to patch
+        unified_diff: Unified diff against the file's current content
+
+    Returns:
+        Success message or error message
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            original = f.read()
+        patched = apply_unified_diff(original, unified_diff)
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(patched)
+        return f"Successfully patched file: {filename}"
+    except Exception as e:
+        return f"Error patching file: {str(e)}"
+
 def execute_python(filename: str) -> str:
     """
     Execute a Python script and return its stdout.